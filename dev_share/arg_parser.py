@@ -48,15 +48,37 @@ class ArgParser(ArgumentParser):
 
         Args:
             description (str): Help description. Defaults to 'Arg Parser'
+            parent_args (list, optional): Args to parse instead of sys.argv. Defaults to None.
             create_arguments (dict, optional): Arguments to create. Defaults to {}.
             help_color (str, optional): terminal color of help header. Defaults to 'yellow'.
         """
         super().__init__(formatter_class=CustomHelpFormatter, description=description)
         self.args = {}
-        self.parent_args = parent_args or []
+        self.parent_args = parent_args
         self.create_arguments = create_arguments or {}
         self.help_color = help_color
 
+    @classmethod
+    def from_table(cls, description: str, parent_args: list, table: tuple, help_color='yellow'):
+        """Create an ArgParser from a pre-flattened argument table. Entries are added directly with
+        argparse.ArgumentParser.add_argument, skipping the create_arguments name/short name handling
+
+        Args:
+            description (str): Help description
+            parent_args (list): Args to parse instead of sys.argv. None to parse sys.argv
+            table (tuple): (arg_name, short_name, arg_values) entries with dashes already applied.
+                Example: ('--export', '-e', {'help': 'export directory'})
+            help_color (str, optional): terminal color of help header. Defaults to 'yellow'.
+
+        Returns:
+            ArgParser: parser with the table arguments added. Exits 1 on failure
+        """
+        parser = cls(description, parent_args, None, help_color)
+        for arg_name, short_name, arg_values in table:
+            if not parser.__handle_adding_arg(short_name, arg_name, arg_values):
+                exit(1)
+        return parser
+
     def format_help(self):
         """Overrides argparse.ArgumentParser.format_help to add color to the command line header to the color set to
         self.help_color
@@ -103,12 +125,14 @@ class ArgParser(ArgumentParser):
         return False
 
     def set_arguments(self):
-        """Loops through create_arguments dict and adds each entry data to argparse.ArgumentParser.add_argument
+        """Loops through create_arguments dict and adds each entry data to argparse.ArgumentParser.add_argument. Each
+        entry is copied so shared argument dicts are not modified
 
         Returns:
             dict: dictionary containing all added args from create_arguments on success. Exits 1 on failure
         """
         for arg_name, arg_values in self.create_arguments.items():
+            arg_values = dict(arg_values)
             arg_name = self.__handle_arg_name(arg_name)
             short_name = self.__handle_arg_shortname(arg_values)
             if arg_name:
@@ -123,10 +147,7 @@ class ArgParser(ArgumentParser):
             dict: dictionary of vars(argparse.ArgumentParser.parse_args) on success. Exits 1 on failure
         """
         try:
-            if self.parent_args:
-                self.args = vars(self.parse_args(self.parent_args))
-            else:
-                self.args = vars(self.parse_args())
+            self.args = vars(self.parse_args(self.parent_args))
             return self.args
         except Exception as error:
             print(f'Failed to parse args: {error}')
@@ -1,6 +1,89 @@
-from argparse import REMAINDER
+from functools import lru_cache
+from sys import argv, stdout
 
-from dev_share.arg_parser import ArgParser
+from dev_share.share_env import read_subnet
+
+
+_PARENT_TABLE = (
+    ('--server', '-s', {'help': 'Share server commands (dshare-server)'}),
+    ('--client', '-c', {'help': 'Share client commands (dshare-client)'}),
+)
+
+_SERVER_TABLE = (
+    ('--display', '-d', {'help': 'display exports', 'action': 'store_true'}),
+    ('--export', '-e', {'help': 'export directory (Provide full path)'}),
+    ('--init', '-I', {'help': 'initialize server service', 'action': 'store_true'}),
+    ('--options', '-o', {'help': 'export options. Default: rw,sync,no_subtree_check,no_root_squash',
+                         'default': 'rw,sync,no_subtree_check,no_root_squash'}),
+    ('--reload', '-r', {'help': 'reload export configuration', 'action': 'store_true'}),
+    ('--remove', '-R', {'help': 'remove export directory (Provide full path)'}),
+    ('--start', '-s', {'help': 'start server service', 'action': 'store_true'}),
+    ('--status', '-st', {'help': 'server service status', 'action': 'store_true'}),
+    ('--stop', '-S', {'help': 'stop server service', 'action': 'store_true'}),
+)
+
+_CLIENT_TABLE = (
+    ('--create', '-c', {'help': 'create mount point (Provide full path to new mount point)'}),
+    ('--init', '-I', {'help': 'initialize client service', 'action': 'store_true'}),
+    ('--ip', '-i', {'help': 'server IP address to use when creating mount point'}),
+    ('--options', '-o', {'help': 'mount options. Default: defaults,nofail,_netdev',
+                         'default': 'defaults,nofail,_netdev'}),
+    ('--remote', '-r', {'help': 'remote directory to mount when creating mount point'}),
+    ('--remove', '-R', {'help': 'remove mount point (Provide full path to mount point)'}),
+    ('--start', '-s', {'help': 'start client service', 'action': 'store_true'}),
+    ('--status', '-st', {'help': 'client service status', 'action': 'store_true'}),
+    ('--stop', '-S', {'help': 'stop client service', 'action': 'store_true'}),
+)
+
+
+def _table_help(prog: str, description: str, table: tuple) -> str:
+    """Build plain help text from an argument table so help can be shown without importing argparse
+
+    Args:
+        prog (str): program name for the usage line
+        description (str): Help description
+        table (tuple): (arg_name, short_name, arg_values) argument entries
+
+    Returns:
+        str: help text
+    """
+    lines = [f'usage: {prog} [options]', '', description, '', '  -h, --help  show this help message and exit']
+    lines.extend(f'  {short_name}, {arg_name}  {arg_values["help"]}' for arg_name, short_name, arg_values in table)
+    return '\n'.join(lines) + '\n'
+
+
+def _is_help_request(args: list) -> bool:
+    """Check if the first argument asks for help so the table help can be shown without importing argparse
+
+    Args:
+        args (list): command line arguments
+
+    Returns:
+        bool: True if help was requested, False otherwise
+    """
+    return bool(args) and args[0] in ('-h', '--help')
+
+
+@lru_cache(maxsize=None)
+def _server():
+    """Get the process wide ShareServer instance, importing dev_share.utils on first use
+
+    Returns:
+        ShareServer: share server instance
+    """
+    from dev_share.utils import ShareServer
+    return ShareServer()
+
+
+@lru_cache(maxsize=None)
+def _client():
+    """Get the process wide ShareClient instance, importing dev_share.utils on first use
+
+    Returns:
+        ShareClient: share client instance
+    """
+    from dev_share.utils import ShareClient
+    return ShareClient()
 
 
 def parse_parent_args(args: dict):
@@ -11,40 +94,52 @@ def parse_parent_args(args: dict):
     return True
 
 
+def _sniff_subcommand():
+    """Look at the first CLI argument to find the requested subcommand so only its parser has to be built
+
+    Returns:
+        function|None: share_server or share_client if requested, None otherwise
+    """
+    flag = argv[1] if len(argv) > 1 else ''
+    if flag in ('-s', '--server'):
+        return share_server
+    if flag in ('-c', '--client'):
+        return share_client
+    return None
+
+
 def share_parent():
-    args = ArgParser('Share Commands', None, {
-        'server': {
-            'short': 's',
-            'help': 'Share server commands (dshare-server)',
-            'nargs': REMAINDER
-        },
-        'client': {
-            'short': 'c',
-            'help': 'Share client commands (dshare-client)',
-            'nargs': REMAINDER
-        },
-    }).set_arguments()
+    if len(argv) == 1 or _is_help_request(argv[1:]):
+        stdout.write(_table_help('dshare', 'Share Commands', _PARENT_TABLE))
+        exit(0)
+    subcommand = _sniff_subcommand()
+    if subcommand:
+        return subcommand(argv[2:])
+    from argparse import REMAINDER
+    from dev_share.arg_parser import ArgParser
+    table = tuple((arg_name, short_name, {**arg_values, 'nargs': REMAINDER})
+                  for arg_name, short_name, arg_values in _PARENT_TABLE)
+    args = ArgParser.from_table('Share Commands', None, table).set_arguments()
     if not parse_parent_args(args):
         exit(1)
     exit(0)
 
 
 def parse_server_args(args: dict):
-    from dev_share.utils import ShareServer
     if args.get('start'):
-        return ShareServer().start_service('nfs-server')
+        return _server().start_service('nfs-server')
     if args.get('status'):
-        return ShareServer().service_status('nfs-server')
+        return _server().service_status('nfs-server')
     if args.get('stop'):
-        return ShareServer().stop_service('nfs-server')
+        return _server().stop_service('nfs-server')
     if args.get('reload'):
-        return ShareServer().reload_exports()
+        return _server().reload_exports()
     if args.get('export'):
-        return ShareServer().add_export(args['export'], args['access'], args['options'])
+        return _server().add_export(args['export'], args['access'], args['options'])
     if args.get('remove'):
-        return ShareServer().remove_export(args['remove'], args['access'])
+        return _server().remove_export(args['remove'], args['access'])
     if args.get('display'):
-        return ShareServer().display_exports()
+        return _server().display_exports()
     if args.get('init'):
         from dev_share.init import Init
         return Init().run_server_init()
@@ -52,78 +147,33 @@ def parse_server_args(args: dict):
 
 
 def share_server(parent_args: list = None):
-    from dev_share.utils import ShareUtils
-    subnet = ShareUtils()._get_env_subnet() or '*'
-    args = ArgParser('Share Server', parent_args, {
-        'access': {
-            'short': 'a',
-            'help': f'access IP or subnet for export. Default: {subnet}',
-            'default': subnet,
-        },
-        'display': {
-            'short': 'd',
-            'help': 'display exports',
-            'action': 'store_true',
-        },
-        'export': {
-            'short': 'e',
-            'help': 'export directory (Provide full path)',
-        },
-        'init': {
-            'short': 'I',
-            'help': 'initialize server service',
-            'action': 'store_true'
-        },
-        'options': {
-            'short': 'o',
-            'help': 'export options. Default: rw,sync,no_subtree_check,no_root_squash',
-            'default': 'rw,sync,no_subtree_check,no_root_squash',
-        },
-        'reload': {
-            'short': 'r',
-            'help': 'reload export configuration',
-            'action': 'store_true'
-        },
-        'remove': {
-            'short': 'R',
-            'help': 'remove export directory (Provide full path)',
-        },
-        'start': {
-            'short': 's',
-            'help': 'start server service',
-            'action': 'store_true',
-        },
-        'status': {
-            'short': 'st',
-            'help': 'server service status',
-            'action': 'store_true',
-        },
-        'stop': {
-            'short': 'S',
-            'help': 'stop server service',
-            'action': 'store_true'
-        },
-    }).set_arguments()
+    subnet = read_subnet() or '*'
+    table = (('--access', '-a', {'help': f'access IP or subnet for export. Default: {subnet}', 'default': subnet}),
+             *_SERVER_TABLE)
+    if _is_help_request(argv[1:] if parent_args is None else parent_args):
+        stdout.write(_table_help('dshare-server', 'Share Server', table))
+        exit(0)
+    from dev_share.arg_parser import ArgParser
+    args = ArgParser.from_table('Share Server', parent_args, table).set_arguments()
     if not parse_server_args(args):
         exit(1)
     exit(0)
 
 
 def parse_client_args(args: dict):
-    from dev_share.utils import ShareClient
     if args.get('start'):
-        return ShareClient().start_service('nfs-client.target')
+        return _client().start_service('nfs-client.target')
     if args.get('status'):
-        return ShareClient().service_status('nfs-client.target')
+        return _client().service_status('nfs-client.target')
     if args.get('stop'):
-        return ShareClient().stop_service('nfs-client.target')
+        return _client().stop_service('nfs-client.target')
     if args.get('create'):
         if not args.get('ip') or not args.get('remote'):
             print('IP and remote directory are required when creating a mount point')
             return False
-        return ShareClient().create_mount(args['ip'], args['remote'], args['create'], args['options'])
+        return _client().create_mount(args['ip'], args['remote'], args['create'], args['options'])
     if args.get('remove'):
-        return ShareClient().remove_mount(args['remove'])
+        return _client().remove_mount(args['remove'])
     if args.get('init'):
         from dev_share.init import Init
         return Init().run_client_init()
@@ -131,49 +181,11 @@ def parse_client_args(args: dict):
 
 
 def share_client(parent_args: list = None):
-    args = ArgParser('Share Client', parent_args, {
-        'create': {
-            'short': 'c',
-            'help': 'create mount point (Provide full path to new mount point)',
-        },
-        'init': {
-            'short': 'I',
-            'help': 'initialize client service',
-            'action': 'store_true'
-        },
-        'ip': {
-            'short': 'i',
-            'help': 'server IP address to use when creating mount point',
-        },
-        'options': {
-            'short': 'o',
-            'help': 'mount options. Default: defaults,nofail,_netdev',
-            'default': 'defaults,nofail,_netdev',
-        },
-        'remote': {
-            'short': 'r',
-            'help': 'remote directory to mount when creating mount point',
-        },
-        'remove': {
-            'short': 'R',
-            'help': 'remove mount point (Provide full path to mount point)',
-        },
-        'start': {
-            'short': 's',
-            'help': 'start client service',
-            'action': 'store_true',
-        },
-        'status': {
-            'short': 'st',
-            'help': 'client service status',
-            'action': 'store_true',
-        },
-        'stop': {
-            'short': 'S',
-            'help': 'stop client service',
-            'action': 'store_true'
-        },
-    }).set_arguments()
+    if _is_help_request(argv[1:] if parent_args is None else parent_args):
+        stdout.write(_table_help('dshare-client', 'Share Client', _CLIENT_TABLE))
+        exit(0)
+    from dev_share.arg_parser import ArgParser
+    args = ArgParser.from_table('Share Client', parent_args, _CLIENT_TABLE).set_arguments()
     if not parse_client_args(args):
         exit(1)
     exit(0)
@@ -1,10 +1,27 @@
-from pathlib import Path
+from functools import lru_cache
 from platform import freedesktop_os_release
+from shlex import quote
 from shutil import which
 
+from dev_share.share_env import SUBNET_FILE
 from dev_share.utils import ShareUtils
 
 
+_which = lru_cache(maxsize=None)(which)
+
+
+@lru_cache(maxsize=1)
+def _os_id_like() -> str:
+    """Get the lowercase ID_LIKE value from os-release, falling back to ID for distros that do not set ID_LIKE.
+    Cached since it does not change during a run
+
+    Returns:
+        str: os-release ID_LIKE or ID value
+    """
+    release = freedesktop_os_release()
+    return (release.get('ID_LIKE') or release.get('ID', '')).lower()
+
+
 class Init(ShareUtils):
     def __init__(self):
         super().__init__()
@@ -18,13 +35,13 @@ class Init(ShareUtils):
         Returns:
             str: The package manager install command
         """
-        os_id = freedesktop_os_release().get('ID_LIKE').lower()
+        os_id = _os_id_like()
         if 'debian' in os_id:
             return 'sudo apt install -y nfs-common nfs-kernel-server'
         if 'rhel' in os_id:
-            if which('dnf'):
+            if _which('dnf'):
                 return 'sudo dnf install -y nfs-utils'
-            if which('yum'):
+            if _which('yum'):
                 return 'sudo yum install -y nfs-utils'
             self.log.error(f'Unable to find package manager for RHEL based system: {os_id}')
         else:
@@ -41,8 +58,7 @@ class Init(ShareUtils):
         self.__subnet = self._get_virbr_subnet()
         if self.__subnet:
             try:
-                with open(f'{Path(__file__).parent}/share_env/subnet', 'w') as file:
-                    file.write(self.__subnet)
+                SUBNET_FILE.write_text(self.__subnet)
                 return True
             except Exception:
                 self.log.exception('Failed to stash bridge subnet')
@@ -68,9 +84,8 @@ class Init(ShareUtils):
             str: The firewall type or an empty string if not found
         """
         for fw in ['ufw', 'firewalld']:
-            if which(fw):
-                if self.run_cmd(f'sudo systemctl is-active {fw}', True, False)[0].strip() == 'active':
-                    return fw
+            if _which(fw) and self.is_service_active(fw):
+                return fw
         self.log.info('Could not find firewall type. Skipping firewall configuration. Add manually for your system')
         return ''
 
@@ -80,12 +95,12 @@ class Init(ShareUtils):
         Returns:
             bool: True if successful, False otherwise
         """
-        for cmd in [f'sudo ufw allow from {self.__subnet} to any port 2049 proto tcp',
-                    f'sudo ufw allow from {self.__subnet} to any port 2049 proto udp',
-                    'sudo ufw reload']:
-            if not self.run_cmd(cmd)[1]:
-                self.log.error('Failed to create server ufw firewall rule')
-                return False
+        cmds = ' && '.join([f'ufw allow from {self.__subnet} to any port 2049 proto tcp',
+                            f'ufw allow from {self.__subnet} to any port 2049 proto udp',
+                            'ufw reload'])
+        if not self.run_cmd(f'sudo sh -c {quote(cmds)}')[1]:
+            self.log.error('Failed to create server ufw firewall rule')
+            return False
         return True
 
     def __set_firewalld_server_firewall_config(self) -> bool:
@@ -95,10 +110,10 @@ class Init(ShareUtils):
             bool: True if successful, False otherwise
         """
         rich_rule = f'rule family="ipv4" source address="{self.__subnet}" service name="nfs" accept'
-        for cmd in [f"sudo firewall-cmd --add-rich-rule='{rich_rule}' --permanent", 'sudo firewall-cmd --reload']:
-            if not self.run_cmd(cmd)[1]:
-                self.log.error('Failed to create server firewalld firewall rule')
-                return False
+        cmds = f'firewall-cmd --add-rich-rule={quote(rich_rule)} --permanent && firewall-cmd --reload'
+        if not self.run_cmd(f'sudo sh -c {quote(cmds)}')[1]:
+            self.log.error('Failed to create server firewalld firewall rule')
+            return False
         return True
 
     def __set_server_firewall_config(self) -> bool:
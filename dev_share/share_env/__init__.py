@@ -0,0 +1,16 @@
+from pathlib import Path
+
+
+SUBNET_FILE = Path(__file__).with_name('subnet')
+
+
+def read_subnet() -> str:
+    """Read the stashed bridge subnet used as the default export access
+
+    Returns:
+        str: The stashed subnet or empty string if not found
+    """
+    try:
+        return SUBNET_FILE.read_text()
+    except Exception:
+        return ''
@@ -1,15 +1,31 @@
+from ipaddress import ip_interface
 from logging import Logger
-from subprocess import run
+from os import makedirs, remove, replace
+from os.path import exists as _path_exists
+from shlex import split
+from shutil import copymode
+from subprocess import DEVNULL, run
+from tempfile import NamedTemporaryFile
 from time import sleep
 from pathlib import Path
 
 from dev_share.logger import get_logger
-from dev_share.color import Color
 
 
 class ShareUtils():
     def __init__(self, logger: Logger = None):
-        self.log = logger or get_logger('dev-share')
+        self.__log = logger
+
+    @property
+    def log(self) -> Logger:
+        """Get the logger. The default dev-share logger is only set up on first use
+
+        Returns:
+            Logger: logging object
+        """
+        if self.__log is None:
+            self.__log = get_logger('dev-share')
+        return self.__log
 
     def _get_virbr_subnet(self, interface: str = 'virbr0') -> str:
         """Get the subnet of the virbr interface. Prompt user if auto-detection fails
@@ -20,11 +36,11 @@ class ShareUtils():
         Returns:
             str: The subnet of the virbr interface
         """
-        rsp = self.run_cmd(f'ip addr show {interface}', True, False)
+        rsp = self.run_cmd(f'ip -4 -br addr show {interface}', True, False)
         if rsp[1]:
-            for line in rsp[0].split('\n'):
-                if 'inet' in line:
-                    return line.split()[1].replace('.1/24', '.0/24')
+            fields = rsp[0].split()
+            if len(fields) > 2:
+                return str(ip_interface(fields[2]).network)
         else:
             sub = input('Failed to auto-detect virbr subnet. Please enter the subnet manually [192.168.120.0/24]: ')
             if not sub:
@@ -32,33 +48,30 @@ class ShareUtils():
             return sub
         return ''
 
-    def _get_env_subnet(self) -> str:
-        """Get the subnet from the stashed file
-
-        Returns:
-            str: The subnet or empty string if not found
-        """
-        try:
-            with open(f'{Path(__file__).parent}/share_env/subnet', 'r') as file:
-                return file.read()
-        except Exception:
-            self.log.exception('Failed to stash bridge subnet')
-        return ''
-
-    def run_cmd(self, cmd: str, ignore_error: bool = False, log_output: bool = False) -> tuple:
-        """Run a command and return the output
+    def run_cmd(self, cmd: str, ignore_error: bool = False, log_output: bool = False,
+                check_only: bool = False) -> tuple:
+        """Run a command and return the output. The command is tokenized and run without a shell
 
         Args:
             cmd (str): Command to run
             ignore_error (bool, optional): ignore errors. Defaults to False
             log_output (bool, optional): Log command output. Defaults to False.
+            check_only (bool, optional): Only check the exit code, output is discarded. Defaults to False.
 
         Returns:
             tuple: (stdout, True. '') on success or (stdout, False, error) on failure
         """
         state = True
         error = ''
-        output = run(cmd, shell=True, capture_output=True, text=True)
+        try:
+            args = split(cmd)
+            if check_only:
+                return '', run(args, stdout=DEVNULL, stderr=DEVNULL).returncode == 0, ''
+            output = run(args, capture_output=True, text=True)
+        except (OSError, ValueError) as cmd_error:
+            if not ignore_error:
+                self.log.error(f'Command: {cmd}\nError: {cmd_error}')
+            return '', False, str(cmd_error)
         if output.returncode != 0:
             state = False
             error = output.stderr
@@ -79,7 +92,7 @@ class ShareUtils():
         Returns:
             bool: True if active, False otherwise
         """
-        return self.run_cmd(f'sudo systemctl is-active {service}', True, False)[0].strip() == 'active'
+        return self.run_cmd(f'sudo systemctl is-active --quiet {service}', True, False, check_only=True)[1]
 
     def is_service_inactive(self, service: str) -> bool:
         """Check if a service is inactive
@@ -92,17 +105,34 @@ class ShareUtils():
         """
         return self.run_cmd(f'sudo systemctl is-active {service}', True, False)[0].strip() == 'inactive'
 
+    def _wait_for_service(self, service: str, active: bool = True, attempts: int = 20, interval: float = 0.05) -> bool:
+        """Poll a service until it reaches the active or inactive state
+
+        Args:
+            service (str): Service name
+            active (bool, optional): wait for active if True, inactive if False. Defaults to True.
+            attempts (int, optional): number of status checks. Defaults to 20.
+            interval (float, optional): seconds to sleep between checks. Defaults to 0.05.
+
+        Returns:
+            bool: True if the service reached the state, False otherwise
+        """
+        check = self.is_service_active if active else self.is_service_inactive
+        for _ in range(attempts):
+            if check(service):
+                return True
+            sleep(interval)
+        return False
+
     def _start_and_enable_nfs_server(self):
         if self.run_cmd('sudo systemctl enable --now nfs-server')[1]:
-            sleep(1)
-            return self.is_service_active('nfs-server')
+            return self._wait_for_service('nfs-server')
         self.log.error('Failed to start and enable nfs-server')
         return False
 
     def _start_and_enable_nfs_client(self):
         if self.run_cmd('sudo systemctl enable --now nfs-client.target')[1]:
-            sleep(1)
-            return self.is_service_active('nfs-client.target')
+            return self._wait_for_service('nfs-client.target')
         self.log.error('Failed to start and enable nfs-client')
         return False
 
@@ -116,8 +146,7 @@ class ShareUtils():
             bool: True if successful, False otherwise
         """
         if self.run_cmd(f'sudo systemctl start {service}')[1]:
-            sleep(1)
-            return self.is_service_active(service)
+            return self._wait_for_service(service)
         self.log.error(f'Failed to start service: {service}')
         return False
 
@@ -131,8 +160,7 @@ class ShareUtils():
             bool: True if successful, False otherwise
         """
         if self.run_cmd(f'sudo systemctl stop {service}')[1]:
-            sleep(1)
-            return self.is_service_inactive(service)
+            return self._wait_for_service(service, False)
         self.log.error(f'Failed to stop service: {service}')
         return False
 
@@ -159,6 +187,7 @@ class ShareUtils():
         Args:
             msg (str): Message to display
         """
+        from dev_share.color import Color
         Color().print_message(msg, 'green')
 
     @staticmethod
@@ -168,6 +197,7 @@ class ShareUtils():
         Args:
             msg (str): Message to display
         """
+        from dev_share.color import Color
         Color().print_message(msg, 'red')
 
 
@@ -179,7 +209,7 @@ class ShareServer(ShareUtils):
             logger (Logger, optional): logging object to use. Defaults to None.
         """
         super().__init__(logger)
-        self.__exports = {}
+        self.__exports = None
 
     @property
     def exports_file(self) -> str:
@@ -191,36 +221,48 @@ class ShareServer(ShareUtils):
         return '/etc/exports'
 
     @property
-    def exports(self) -> dict:
+    def exports(self) -> dict | None:
         """Get the exports dictionary. If not set, read from file and create exports dict
 
         Returns:
-            dict: Exports dictionary
+            dict|None: Exports dictionary or None if the exports file could not be loaded
         """
-        if not self.__exports:
+        if self.__exports is None:
             self.__exports = self.__load_exports()
         return self.__exports
 
-    def __load_exports(self) -> dict:
+    def __load_exports(self) -> dict | None:
         """Load the exports file into a dictionary
 
         Returns:
-            dict: Exports dictionary
+            dict|None: Exports dictionary or None on failure
         """
         exports = {}
         try:
             with open(self.exports_file) as file:
-                for line in file.readlines():
+                for line in file:
+                    stripped = line.strip()
+                    if not stripped or stripped.startswith('#'):
+                        continue
                     line_split = line.split()
                     right_split = line_split[1].split('(')
-                    exports[line_split[0] + right_split[0]] = {'path': line_split[0],
-                                                               'client': right_split[0],
-                                                               'options': right_split[1].replace(')', '')}
+                    exports[f'{line_split[0]}{right_split[0]}'] = {'path': line_split[0],
+                                                                   'client': right_split[0],
+                                                                   'options': right_split[1].replace(')', '')}
         except Exception:
             self.log.exception('Failed to load exports')
-            return {}
+            return None
         return exports
 
+    def __format_exports(self) -> str:
+        """Format the exports dictionary data the way it is written to the exports file
+
+        Returns:
+            str: Exports file content
+        """
+        return ''.join(f'{export["path"]} {export["client"]}({export["options"]})\n'
+                       for export in self.exports.values())
+
     def __set_exports_config(self) -> bool:
         """Set the exports file with the exports dictionary data. Display exports to console after setting
 
@@ -228,14 +270,11 @@ class ShareServer(ShareUtils):
             bool: True if successful, False otherwise
         """
         try:
-            with open(self.exports_file, 'w') as file:
-                for export in self.exports.values():
-                    export: dict
-                    file.write(f'{export["path"]} {export["client"]}({export["options"]})\n')
+            Path(self.exports_file).write_text(self.__format_exports())
         except Exception:
             self.log.exception('Failed to set exports file')
             return False
-        return self.reload_exports()
+        return self.__apply_exports()
 
     def __ensure_service_is_running(self) -> bool:
         """Ensure the NFS service is running. If service is not running, attempt to start it
@@ -249,7 +288,16 @@ class ShareServer(ShareUtils):
         return True
 
     def reload_exports(self) -> bool:
-        """Reload the exports file data
+        """Reload the exports file data. The cached exports dictionary is dropped so it is re-read from the file
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        self.__exports = None
+        return self.__apply_exports()
+
+    def __apply_exports(self) -> bool:
+        """Apply the exports file with exportfs and display the exports dictionary
 
         Returns:
             bool: True if successful, False otherwise
@@ -261,7 +309,8 @@ class ShareServer(ShareUtils):
 
     def add_export(self, export_path: str, client: str,
                    options: str = 'rw,sync,no_subtree_check,no_root_squash') -> bool:
-        """Add an export to the exports file so clients can import and mount the share
+        """Add an export to the exports file so clients can import and mount the share. Nothing is written or reloaded
+        if the export already exists with the same options
 
         Args:
             export_path (str): the path to export
@@ -271,14 +320,17 @@ class ShareServer(ShareUtils):
         Returns:
             bool: True if successful, False otherwise
         """
-        if not Path(export_path).exists():
+        if not _path_exists(export_path):
             self.log.error(f'Export path does not exist {export_path}')
             return False
-        for export_name in self.exports:
-            if export_name == export_path + client:
-                self.exports[export_name] = {'path': export_path, 'client': client, 'options': options}
-                return self.__set_exports_config()
-        self.exports[export_path + client] = {'path': export_path, 'client': client, 'options': options}
+        if self.exports is None:
+            return False
+        export_name = f'{export_path}{client}'
+        export = {'path': export_path, 'client': client, 'options': options}
+        if self.exports.get(export_name) == export:
+            self.log.info('Export already exists')
+            return True
+        self.exports[export_name] = export
         return self.__set_exports_config()
 
     def remove_export(self, export_path: str, client: str = 'all') -> bool:
@@ -292,13 +344,17 @@ class ShareServer(ShareUtils):
         Returns:
             bool: True if successful, False otherwise
         """
+        if self.exports is None:
+            return False
         if client == 'all':
-            export_names = list(self.exports.keys())
+            export_names = [export_name for export_name in self.exports if export_name.startswith(export_path)]
+            if not export_names:
+                self.log.info('Export not found')
+                return True
             for export_name in export_names:
-                if export_name.startswith(export_path):
-                    self.exports.pop(export_name)
+                self.exports.pop(export_name)
         else:
-            export_name = export_path + client
+            export_name = f'{export_path}{client}'
             if export_name in self.exports:
                 self.exports.pop(export_name)
             else:
@@ -307,19 +363,14 @@ class ShareServer(ShareUtils):
         return self.__set_exports_config()
 
     def display_exports(self) -> bool:
-        """Display the exports file data to console
+        """Display the exports data to console. Uses the loaded exports dictionary instead of re-reading the file
 
         Returns:
             bool: True if successful, False otherwise
         """
-        data = 'Exports:\n'
-        try:
-            with open('/etc/exports', 'r') as file:
-                data += file.read()
-        except Exception:
-            self.log.exception('Failed to read exports file')
+        if self.exports is None:
             return False
-        self.display_successful(data.strip())
+        self.display_successful(f'Exports:\n{self.__format_exports()}'.strip())
         return True
 
 
@@ -354,10 +405,12 @@ class ShareClient(ShareUtils):
             bool: True if successful, False otherwise
         """
         try:
+            target = entry.split()[0]
             with open('/etc/fstab', 'r') as file:
-                if entry.split()[0] in file.read():
-                    self.log.debug('Entry already exists in fstab')
-                    return True
+                exists = any(line.split()[:1] == [target] for line in file)
+            if exists:
+                self.log.debug('Entry already exists in fstab')
+                return True
             with open('/etc/fstab', 'a') as file:
                 file.write(f'{entry}\n')
             self.log.debug('Successfully created fstab entry')
@@ -367,7 +420,7 @@ class ShareClient(ShareUtils):
         return False
 
     def __remove_fstab_entry(self, mount: str) -> bool:
-        """Remove an entry from the fstab file
+        """Remove an entry from the fstab file. The file is streamed into a temp file that atomically replaces it
 
         Args:
             mount (str): Mount path to remove
@@ -375,18 +428,24 @@ class ShareClient(ShareUtils):
         Returns:
             bool: True if successful, False otherwise
         """
+        tmp_file = None
         try:
-            payload = []
-            with open('/etc/fstab', 'r') as file:
-                for line in file.readlines():
-                    if mount in line:
+            with open('/etc/fstab', 'r') as src, NamedTemporaryFile('w', dir='/etc', delete=False) as dst:
+                tmp_file = dst.name
+                for line in src:
+                    if line.split()[1:2] == [mount]:
                         continue
-                    payload.append(line)
-            with open('/etc/fstab', 'w') as file:
-                file.write(''.join(payload))
+                    dst.write(line)
+            copymode('/etc/fstab', tmp_file)
+            replace(tmp_file, '/etc/fstab')
             return True
         except Exception:
             self.log.exception(f'Failed to remove fstab entry for mount {mount}')
+            if tmp_file:
+                try:
+                    remove(tmp_file)
+                except OSError:
+                    pass
         return False
 
     def create_mount(self, server_ip: str, share_path: str, mount: str,
@@ -403,7 +462,7 @@ class ShareClient(ShareUtils):
             bool: True if successful, False otherwise
         """
         try:
-            Path(mount).mkdir(parents=True, exist_ok=True)
+            makedirs(mount, exist_ok=True)
         except Exception:
             self.log.exception(f'Failed to create mount directory: {mount}')
             return False